@@ -1,11 +1,18 @@
+import asyncio
+import os
+import httpx
+import numpy as np
 import streamlit as st
 import pandas as pd
-import pandas_ta as ta
+import talib
+from talib import MA_Type
+from numba import njit
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from SmartApi import SmartConnect
 import pyotp
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
 
 st.set_page_config(page_title="Pro Trader Dashboard", layout="wide")
 
@@ -35,154 +42,407 @@ if check_password != APP_PASSWORD:
     st.stop()
 
 # --- 1. LOGIN ---
-@st.cache_resource
+class LoginError(Exception):
+    pass
+
+# Angel sessions expire server-side (~24h), so never hold one longer than a few hours.
+# Failures raise, so cache_resource never keeps a failed login around.
+@st.cache_resource(ttl=timedelta(hours=6))
 def login():
+    smartApi = SmartConnect(api_key=API_KEY)
+    totp = pyotp.TOTP(TOTP_SECRET).now()
+    data = smartApi.generateSession(CLIENT_CODE, PASSWORD, totp)
+    if not data['status']:
+        raise LoginError(data['message'])
+    # Keep the bearer token so candle fetches can skip the SDK
+    return smartApi, data['data']['jwtToken']
+
+# Every retry is a fresh TOTP login, so after a failure wait before trying again (avoids broker lockout)
+LOGIN_RETRY_AFTER = timedelta(minutes=1)
+
+@st.cache_resource
+def _login_backoff():
+    # Shared by all sessions: when the last login failed and why
+    return {}
+
+def session_jwt():
+    # Returns the bearer token, or raises LoginError with a message ready to show
+    backoff = _login_backoff()
+    if backoff and datetime.now() - backoff['at'] < LOGIN_RETRY_AFTER:
+        raise LoginError(backoff['message'])
     try:
-        smartApi = SmartConnect(api_key=API_KEY)
-        totp = pyotp.TOTP(TOTP_SECRET).now()
-        data = smartApi.generateSession(CLIENT_CODE, PASSWORD, totp)
-        if data['status']:
-            return smartApi
-        else:
-            st.error(f"Login Failed: {data['message']}")
-            return None
+        jwt = login()[1]
     except Exception as e:
-        st.error(f"Connection Error: {e}")
-        return None
+        message = f"Login Failed: {e}" if isinstance(e, LoginError) else f"Connection Error: {e}"
+        backoff.update(at=datetime.now(), message=message)
+        raise LoginError(message) from e
+    backoff.clear()
+    return jwt
 
 # --- 2. LOAD TOKENS ---
 # We use a built-in list or fetch it if needed. 
 # For Cloud, it's safer to fetch it live or use a smaller static list if the file is missing.
+TOKENS_CSV = "angel_tokens.csv"
+TOKENS_PARQUET = "angel_tokens.parquet"  # Built from the CSV on first load; much faster cold starts
+
+def _parquet_is_fresh():
+    # Prefer the parquet copy unless the CSV has been updated since it was written
+    if not os.path.exists(TOKENS_PARQUET):
+        return False
+    if not os.path.exists(TOKENS_CSV):
+        return True  # No CSV to compare against; the parquet is all we have
+    try:
+        return os.path.getmtime(TOKENS_PARQUET) >= os.path.getmtime(TOKENS_CSV)
+    except OSError:
+        return False
+
+def _write_tokens_parquet(df):
+    # Write beside the target and rename, so a crash or full disk never leaves a truncated parquet behind
+    tmp = f"{TOKENS_PARQUET}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, compression='zstd', index=False)
+        os.replace(tmp, TOKENS_PARQUET)
+    except OSError:
+        # Read-only deploys just keep using the CSV
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
 @st.cache_data
 def load_tokens():
-    try:
-        # Try to read local file first
-        return pd.read_csv("angel_tokens.csv")
-    except:
-        # If file missing (common in cloud), return empty or handle download
-        st.warning("⚠️ Token file not found. Please upload 'angel_tokens.csv' to GitHub or add code to download it.")
-        return pd.DataFrame()
+    df = None
+    if _parquet_is_fresh():
+        try:
+            df = pd.read_parquet(TOKENS_PARQUET, columns=['name', 'token', 'symbol'])
+        except (OSError, ValueError):
+            df = None  # Unreadable copy: rebuild it from the CSV below
+    if df is None:
+        try:
+            # Try to read local file first
+            df = pd.read_csv(TOKENS_CSV, usecols=['name', 'token', 'symbol'], engine='pyarrow',
+                             dtype={'token': 'string', 'name': 'category', 'symbol': 'category'})
+        except FileNotFoundError:
+            # If file missing (common in cloud), return empty or handle download
+            st.warning("⚠️ Token file not found. Please upload 'angel_tokens.csv' to GitHub or add code to download it.")
+            return {}
+        except (OSError, ValueError, KeyError) as e:
+            # pyarrow raises ArrowInvalid (ValueError) for bad rows, ArrowKeyError for missing columns
+            st.warning(f"⚠️ Could not read '{TOKENS_CSV}': {e}")
+            return {}
+        _write_tokens_parquet(df)
+    # name -> (token, symbol), so the sidebar lookup is a dict hit instead of a DataFrame scan
+    return {row['name']: (str(row['token']), row['symbol']) for row in df.to_dict('records')}
+
+# Log in up front so credential errors show once here, before the dashboard renders
+try:
+    session_jwt()
+except LoginError as e:
+    st.error(str(e))
+    st.stop()
 
-api = login()
-tokens_df = load_tokens()
+tokens = load_tokens()
 
 # --- 3. DATA ENGINE ---
-def fetch_data(token, interval, days):
+CANDLE_URL = "https://apiconnect.angelone.in/rest/secure/angelbroking/historical/v1/getCandleData"
+MAX_CONCURRENT_FETCHES = 4  # Stay under Angel's historical API rate limit
+TOKEN_EXPIRED_CODES = {"AG8001", "AG8002"}  # Invalid Token / Token Expired
+MARKET_TZ = ZoneInfo("Asia/Kolkata")  # The API takes NSE wall-clock times; hosts usually run on UTC
+
+class AngelAPIError(Exception):
+    pass
+
+class TokenExpiredError(AngelAPIError):
+    pass
+
+def api_headers(jwt):
+    return {
+        "Authorization": f"Bearer {jwt}",
+        "Content-Type": "application/json",
+        "Accept": "application/json",
+        "X-UserType": "USER",
+        "X-SourceID": "WEB",
+        "X-ClientLocalIP": "127.0.0.1",
+        "X-ClientPublicIP": "127.0.0.1",
+        "X-MACAddress": "00:00:00:00:00:00",
+        "X-PrivateKey": API_KEY,
+    }
+
+async def afetch_candles(client, limit, token, interval, days):
     try:
+        # One IST clock read, snapped to the minute (the API's resolution) so both ends agree
+        now = datetime.now(MARKET_TZ).replace(second=0, microsecond=0, tzinfo=None)
         params = {
             "exchange": "NSE",
             "symboltoken": token,
             "interval": interval,
-            "fromdate": (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d %H:%M"), 
-            "todate": datetime.now().strftime("%Y-%m-%d %H:%M")
+            "fromdate": (now - timedelta(days=days)).strftime("%Y-%m-%d %H:%M"), 
+            "todate": now.strftime("%Y-%m-%d %H:%M")
         }
-        data = api.getCandleData(params)
-        df = pd.DataFrame(data['data'], columns=["Timestamp", "Open", "High", "Low", "Close", "Volume"])
-        df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-        df.set_index('Timestamp', inplace=True)
-        return df.astype(float)
-    except:
-        return None
-
-# --- 4. INDICATOR CALCULATION (ROBUST) ---
-def add_indicators(df, is_intraday=False):
+        async with limit:
+            resp = await client.post(CANDLE_URL, json=params)
+        if resp.status_code == 401:
+            raise TokenExpiredError(interval)
+        payload = resp.json()
+        if not isinstance(payload, dict):
+            raise AngelAPIError(f"{interval}: unexpected response body ({type(payload).__name__})")
+        # The historical API answers with status/errorcode, the auth gateway with success/errorCode
+        error_code = payload.get('errorcode') or payload.get('errorCode')
+        if error_code in TOKEN_EXPIRED_CODES:
+            raise TokenExpiredError(interval)
+        if not payload.get('status', payload.get('success', True)):
+            raise AngelAPIError(f"{interval}: {payload.get('message')} ({error_code})")
+        rows = payload['data']
+        if not isinstance(rows, list):
+            raise AngelAPIError(f"{interval}: unexpected candle data ({rows!r})")
+        if not rows:
+            return pd.DataFrame()
+        # Rows are [timestamp, open, high, low, close, volume]; slice them into typed columns in one go.
+        # Prices fit in float32; volume stays float64 since big counts lose precision in float32
+        if any(not isinstance(r, list) or len(r) != 6 for r in rows):
+            raise AngelAPIError(f"{interval}: malformed candle rows")
+        arr = np.array(rows, dtype=object)
+        index = pd.DatetimeIndex(pd.to_datetime(arr[:, 0]), name="Timestamp")
+        return pd.DataFrame({
+            "Open": arr[:, 1].astype(np.float32),
+            "High": arr[:, 2].astype(np.float32),
+            "Low": arr[:, 3].astype(np.float32),
+            "Close": arr[:, 4].astype(np.float32),
+            "Volume": arr[:, 5].astype(np.float64),
+        }, index=index)
+    except (KeyError, ValueError) as e:
+        # Raise rather than return None so st.cache_data never stores a failed fetch.
+        # httpx.HTTPError propagates as-is so the UI can tell network trouble from API trouble.
+        raise AngelAPIError(f"{interval}: unexpected response ({e})") from e
+
+async def afetch_timeframes(jwt, token, timeframes):
+    # One shared client + semaphore so the requests overlap without hammering the broker
+    limit = asyncio.Semaphore(MAX_CONCURRENT_FETCHES)
+    async with httpx.AsyncClient(headers=api_headers(jwt), timeout=15) as client:
+        return await asyncio.gather(
+            *(afetch_candles(client, limit, token, interval, days) for interval, days in timeframes)
+        )
+
+# During the session a new 15-min bar (and a moving daily close) lands every slot. Outside it the
+# candles only change at the open and the close, so pre-open and post-close each get one key per day.
+MARKET_OPEN, MARKET_CLOSE = time(9, 15), time(15, 30)
+
+def freshness_key(now):
+    if now.time() < MARKET_OPEN:
+        return (now.date(), "pre")
+    if now.time() > MARKET_CLOSE:
+        return (now.date(), "post")
+    return now.replace(minute=now.minute - now.minute % 15, second=0, microsecond=0, tzinfo=None)
+
+# Both timeframes share one key, so the daily close/volume are never older than the intraday chart.
+# _jwt is left out of the cache key; freshness expires entries on its own, ttl just bounds memory.
+@st.cache_data(ttl=timedelta(hours=8), show_spinner=False)
+def fetch_dashboard(token, freshness, _jwt):
+    return asyncio.run(afetch_timeframes(_jwt, token, [("ONE_DAY", 365), ("FIFTEEN_MINUTE", 10)]))
+
+def load_dashboard(token):
+    # Runs on the script thread, so login errors show and only one re-login can happen
+    freshness = freshness_key(datetime.now(MARKET_TZ))
+    try:
+        return fetch_dashboard(token, freshness, _jwt=session_jwt())
+    except TokenExpiredError:
+        # Session died before the TTL did: log in again and retry once
+        login.clear()
+        try:
+            return fetch_dashboard(token, freshness, _jwt=session_jwt())
+        except TokenExpiredError as e:
+            raise AngelAPIError("session expired and re-login did not help") from e
+
+# --- 4. INDICATOR CALCULATION (TA-LIB) ---
+# Fixed indicator settings, shared by the chart series and the last-bar signals
+TREND_LENGTH = 50           # SMA_TREND / EMA_TREND
+SUPERTREND_LENGTH = 10      # ATR period
+SUPERTREND_MULTIPLIER = 3
+RSI_LENGTH = 14
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+BB_LENGTH, BB_STD = 20, 2
+VOL_SMA_LENGTH = 5          # Vol_SMA
+
+def _f64(series):
+    # TA-Lib only accepts float64 input. float64 columns (Volume) come back as a view of the
+    # frame's block; the float32 price columns are widened with one copy.
+    return series.to_numpy(dtype=np.float64, copy=False)
+
+# fastmath without nnan/ninf: the ATR warm-up bars are NaN and must compare as False
+@njit(cache=True, fastmath={'reassoc', 'contract', 'arcp', 'nsz', 'afn'})
+def _supertrend_flip(close, upper, lower):
+    # Bands ratchet until price crosses them; each bar depends on the previous one, so this stays a loop
+    n = close.shape[0]
+    trend = np.full(n, np.nan, dtype=np.float32)
+    direction = 1
+    for i in range(1, n):
+        if close[i] > upper[i - 1]:
+            direction = 1
+        elif close[i] < lower[i - 1]:
+            direction = -1
+        else:
+            if direction > 0 and lower[i] < lower[i - 1]:
+                lower[i] = lower[i - 1]
+            if direction < 0 and upper[i] > upper[i - 1]:
+                upper[i] = upper[i - 1]
+        trend[i] = lower[i] if direction > 0 else upper[i]
+    return trend
+
+def supertrend(high, low, close, atr, multiplier=SUPERTREND_MULTIPLIER):
+    # TradingView-style Supertrend on a precomputed ATR series; float32 keeps one compiled signature
+    hl2 = (high + low) / 2
+    band = multiplier * atr
+    return _supertrend_flip(
+        np.ascontiguousarray(close, dtype=np.float32),
+        np.ascontiguousarray(hl2 + band, dtype=np.float32),
+        np.ascontiguousarray(hl2 - band, dtype=np.float32),
+    )
+
+def vwap(df):
+    # Session VWAP, reset at the start of every trading day
+    day = df.index.normalize()
+    typical = (df['High'] + df['Low'] + df['Close']) / 3
+    return (typical * df['Volume']).groupby(day).cumsum() / df['Volume'].groupby(day).cumsum()
+
+def _frame_key(df):
+    # Cheap cache key: a new bar or a different stock changes one of these
+    return (df.index[-1], len(df), df['Close'].iat[-1], df['Volume'].iat[-1])
+
+@st.cache_data(hash_funcs={pd.DataFrame: _frame_key})
+def add_indicators_full(df, is_intraday=False):
+    # Pull each input column out once and hand the same arrays to every TA-Lib call below
+    close, high, low, volume = _f64(df['Close']), _f64(df['High']), _f64(df['Low']), _f64(df['Volume'])
+
     # Trend
-    df['SMA_50'] = ta.sma(df['Close'], length=50)
-    df['EMA_50'] = ta.ema(df['Close'], length=50)
+    df['SMA_TREND'] = talib.SMA(close, TREND_LENGTH)
+    df['EMA_TREND'] = talib.EMA(close, TREND_LENGTH)
     
-    # Supertrend (Auto-Find)
-    st_data = ta.supertrend(df['High'], df['Low'], df['Close'], length=10, multiplier=3)
-    if st_data is not None:
-        st_col = [col for col in st_data.columns if col.startswith('SUPERT_')][0]
-        df['Supertrend'] = st_data[st_col]
+    # Volatility (ATR, shared with Supertrend)
+    atr = talib.ATR(high, low, close, SUPERTREND_LENGTH)
+    df['ATR'] = atr
+
+    # Supertrend
+    df['Supertrend'] = supertrend(high, low, close, atr, multiplier=SUPERTREND_MULTIPLIER)
     
-    # Momentum
-    df['RSI'] = ta.rsi(df['Close'], length=14)
-    macd = ta.macd(df['Close'])
-    if macd is not None:
-        macd_col = [col for col in macd.columns if col.startswith('MACD_')][0]
-        signal_col = [col for col in macd.columns if col.startswith('MACDs_')][0]
-        df['MACD'] = macd[macd_col]
-        df['MACD_Signal'] = macd[signal_col]
-
-    # Volatility (Bollinger Bands Auto-Find)
-    bb = ta.bbands(df['Close'], length=20)
-    if bb is not None:
-        bb_upper_col = [col for col in bb.columns if col.startswith('BBU_')][0]
-        bb_lower_col = [col for col in bb.columns if col.startswith('BBL_')][0]
-        df['BB_Upper'] = bb[bb_upper_col]
-        df['BB_Lower'] = bb[bb_lower_col]
+    # Momentum (EMA-based MACD, same as TradingView)
+    df['RSI'] = talib.RSI(close, RSI_LENGTH)
+    macd, macd_signal, macd_hist = talib.MACDEXT(close, fastperiod=MACD_FAST, fastmatype=MA_Type.EMA, slowperiod=MACD_SLOW, slowmatype=MA_Type.EMA, signalperiod=MACD_SIGNAL, signalmatype=MA_Type.EMA)
+    df['MACD'] = macd
+    df['MACD_Signal'] = macd_signal
+    df['MACD_Hist'] = macd_hist
+
+    # Volatility (Bollinger Bands)
+    bb_upper, _, bb_lower = talib.BBANDS(close, BB_LENGTH, BB_STD, BB_STD)
+    df['BB_Upper'] = bb_upper
+    df['BB_Lower'] = bb_lower
     
     # Volume
-    df['Vol_SMA_5'] = ta.sma(df['Volume'], length=5)
+    df['Vol_SMA'] = talib.SMA(volume, VOL_SMA_LENGTH)
 
     # VWAP (Only valid for Intraday)
     if is_intraday:
-        df['VWAP'] = ta.vwap(df['High'], df['Low'], df['Close'], df['Volume'])
+        df['VWAP'] = vwap(df)
 
     return df
 
-# --- 5. DASHBOARD LAYOUT ---
+# Columns the Rule of Three reads from each frame's last bar (see score_row)
+DAILY_SIGNAL_COLS = ['Close', 'Volume', 'EMA_TREND', 'RSI', 'Vol_SMA']
+INTRA_SIGNAL_COLS = ['Close', 'VWAP']
+
+def last_signals(df, is_intraday=False):
+    # Final-bar scalars from the series add_indicators_full already computed, without building an iloc[-1] row
+    cols = INTRA_SIGNAL_COLS if is_intraday else DAILY_SIGNAL_COLS
+    return {col: df[col].iat[-1] for col in cols}
+
+# --- 5. RULE OF THREE SCORING ---
+def score_row(daily_tail, intra_tail):
+    # Arrays with one entry per stock (or last_signals() scalars), so a watchlist scores in one vectorised pass
+    close = np.asarray(daily_tail['Close'])
+    rsi = np.asarray(daily_tail['RSI'])
+    signals = {
+        'trend': close > np.asarray(daily_tail['EMA_TREND']),
+        'momentum': (rsi > 50) & (rsi < 70),
+        'volume': np.asarray(daily_tail['Volume']) > np.asarray(daily_tail['Vol_SMA']),
+        'intraday': np.asarray(intra_tail['Close']) > np.asarray(intra_tail['VWAP']),
+    }
+    score = signals['trend'].astype(np.int8) + signals['momentum'] + signals['volume']
+    return score, signals
+
+# --- 6. CHART HELPERS ---
+MAX_CHART_BARS = 2000  # Candlesticks are SVG-only; past this the browser spends its time on reflows
+
+def chart_x(df):
+    # The candle index is tz-aware (IST), and to_numpy() on that is an object array of Timestamps.
+    # Drop the zone (keeping wall-clock time) so plotly gets a plain datetime64 array.
+    return df.index.tz_localize(None).to_numpy()
+
+def ohlc_arrays(df, x):
+    # Hand plotly plain numpy arrays so it skips per-Series coercion
+    return dict(x=x, open=df['Open'].to_numpy(), high=df['High'].to_numpy(),
+                low=df['Low'].to_numpy(), close=df['Close'].to_numpy())
+
+# --- 7. DASHBOARD LAYOUT ---
 st.sidebar.header("🔍 Stock Selector")
 
-if tokens_df.empty:
+if not tokens:
     st.error("⚠️ Stock list is empty. Please check 'angel_tokens.csv'.")
     st.stop()
 else:
-    stock_name = st.sidebar.selectbox("Select Stock", tokens_df['name'].unique())
-    row = tokens_df[tokens_df['name'] == stock_name].iloc[0]
-    token = str(row['token'])
-    symbol = row['symbol']
+    stock_name = st.sidebar.selectbox("Select Stock", list(tokens.keys()))
+    token, symbol = tokens[stock_name]
 
 if st.sidebar.button("Analyze (Rule of 3)"):
     with st.spinner("Fetching Multi-Timeframe Data..."):
-        # 1. Fetch Daily Data
-        df_daily = fetch_data(token, "ONE_DAY", 365)
-        
-        # 2. Fetch 15-Min Data
-        df_intra = fetch_data(token, "FIFTEEN_MINUTE", 10)
+        # Fetch Daily + 15-Min Data concurrently
+        try:
+            df_daily, df_intra = load_dashboard(token)
+        except httpx.HTTPError as e:
+            st.warning(f"🌐 Network error reaching Angel One ({type(e).__name__}). Check your connection and try again.")
+            st.stop()
+        except AngelAPIError as e:
+            st.error(f"⚠️ Angel One API error: {e}")
+            st.stop()
+        except LoginError as e:
+            st.error(str(e))
+            st.stop()
 
-        if df_daily is not None and not df_daily.empty and df_intra is not None and not df_intra.empty:
+        if not df_daily.empty and not df_intra.empty:
             
             # Add Indicators
-            df_daily = add_indicators(df_daily, is_intraday=False)
-            df_intra = add_indicators(df_intra, is_intraday=True)
+            df_daily = add_indicators_full(df_daily, is_intraday=False)
+            df_intra = add_indicators_full(df_intra, is_intraday=True)
 
-            last_day = df_daily.iloc[-1]
-            last_15 = df_intra.iloc[-1]
+            last_day = last_signals(df_daily)
+            last_15 = last_signals(df_intra, is_intraday=True)
             
             st.title(f"📊 {stock_name} Professional Analysis")
             
 # --- THE RULE OF THREE LOGIC ---
-            score = 0
+            score, signals = score_row(last_day, last_15)
+            score = int(score)
             
             # CATEGORY 1: TREND (Daily Chart)
-            trend_bullish = last_day['Close'] > last_day['EMA_50']
+            trend_bullish = bool(signals['trend'])
             trend_msg = "BULLISH" if trend_bullish else "BEARISH"
             trend_color = "green" if trend_bullish else "red"
-            if trend_bullish: score += 1
 
             # CATEGORY 2: MOMENTUM (Daily RSI)
             rsi_val = last_day['RSI']
-            mom_bullish = 50 < rsi_val < 70
+            mom_bullish = bool(signals['momentum'])
             mom_msg = f"RSI {rsi_val:.1f}"
             mom_color = "green" if mom_bullish else "orange"
-            if mom_bullish: score += 1
 
             # CATEGORY 3: VOLUME
-            vol_bullish = last_day['Volume'] > last_day['Vol_SMA_5']
+            vol_bullish = bool(signals['volume'])
             vol_msg = "High Vol" if vol_bullish else "Low Vol"
             vol_color = "green" if vol_bullish else "red"
-            if vol_bullish: score += 1
             
             # Intraday Check
-            intra_bullish = last_15['Close'] > last_15['VWAP']
+            intra_bullish = bool(signals['intraday'])
             intra_msg = "Price > VWAP" if intra_bullish else "Price < VWAP"
             intra_color = "green" if intra_bullish else "red"
 
             # --- DISPLAY SUMMARY ---
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Current Price", f"₹{last_day['Close']}")
+            col1.metric("Current Price", f"₹{last_day['Close']:.2f}")
             col2.metric("Daily Trend", trend_msg)
             col3.metric("RSI Momentum", f"{rsi_val:.1f}")
             col4.metric("Intraday Signal", intra_msg)
@@ -191,7 +451,7 @@ if st.sidebar.button("Analyze (Rule of 3)"):
 
             # --- THE RULE OF THREE CHECKLIST ---
             c1, c2, c3 = st.columns(3)
-            c1.markdown(f"**1. Trend (EMA 50):** :{trend_color}[{trend_msg}]")
+            c1.markdown(f"**1. Trend (EMA {TREND_LENGTH}):** :{trend_color}[{trend_msg}]")
             c2.markdown(f"**2. Momentum (RSI):** :{mom_color}[{mom_msg}]")
             c3.markdown(f"**3. Volume:** :{vol_color}[{vol_msg}]")
 
@@ -206,21 +466,25 @@ if st.sidebar.button("Analyze (Rule of 3)"):
             tab1, tab2 = st.tabs(["Daily Chart (Trend)", "15-Min Chart (Entry)"])
 
             with tab1:
+                plot_daily = df_daily.tail(MAX_CHART_BARS)
+                daily_idx = chart_x(plot_daily)
                 fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.7, 0.3])
-                fig.add_trace(go.Candlestick(x=df_daily.index, open=df_daily['Open'], high=df_daily['High'], low=df_daily['Low'], close=df_daily['Close'], name="Price"), row=1, col=1)
-                fig.add_trace(go.Scatter(x=df_daily.index, y=df_daily['EMA_50'], line=dict(color='orange'), name="50 EMA"), row=1, col=1)
-                if 'Supertrend' in df_daily.columns:
-                    fig.add_trace(go.Scatter(x=df_daily.index, y=df_daily['Supertrend'], line=dict(color='green', dash='dot'), name="Supertrend"), row=1, col=1)
-                fig.add_trace(go.Bar(x=df_daily.index, y=df_daily['MACD'] - df_daily['MACD_Signal'], name="MACD Hist"), row=2, col=1)
-                fig.update_layout(height=600, template="plotly_dark", title_text="Daily Trend Analysis")
+                fig.add_trace(go.Candlestick(**ohlc_arrays(plot_daily, daily_idx), name="Price"), row=1, col=1)
+                fig.add_trace(go.Scattergl(x=daily_idx, y=plot_daily['EMA_TREND'].to_numpy(), line=dict(color='orange'), name=f"{TREND_LENGTH} EMA"), row=1, col=1)
+                fig.add_trace(go.Scattergl(x=daily_idx, y=plot_daily['Supertrend'].to_numpy(), line=dict(color='green', dash='dot'), name="Supertrend"), row=1, col=1)
+                fig.add_trace(go.Bar(x=daily_idx, y=plot_daily['MACD_Hist'].to_numpy(), name="MACD Hist"), row=2, col=1)
+                fig.update_layout(height=600, template="plotly_dark", title_text="Daily Trend Analysis",
+                                  xaxis_rangeslider_visible=False, uirevision=token)
                 st.plotly_chart(fig, use_container_width=True)
 
             with tab2:
+                plot_intra = df_intra.tail(MAX_CHART_BARS)
+                intra_idx = chart_x(plot_intra)
                 fig2 = go.Figure()
-                fig2.add_trace(go.Candlestick(x=df_intra.index, open=df_intra['Open'], high=df_intra['High'], low=df_intra['Low'], close=df_intra['Close'], name="Intraday Price"))
-                if 'VWAP' in df_intra.columns:
-                    fig2.add_trace(go.Scatter(x=df_intra.index, y=df_intra['VWAP'], line=dict(color='cyan'), name="VWAP"))
-                fig2.update_layout(height=500, template="plotly_dark", title_text="15-Minute Entry Chart (VWAP)")
+                fig2.add_trace(go.Candlestick(**ohlc_arrays(plot_intra, intra_idx), name="Intraday Price"))
+                fig2.add_trace(go.Scattergl(x=intra_idx, y=plot_intra['VWAP'].to_numpy(), line=dict(color='cyan'), name="VWAP"))
+                fig2.update_layout(height=500, template="plotly_dark", title_text="15-Minute Entry Chart (VWAP)",
+                                   xaxis_rangeslider_visible=False, uirevision=token)
                 st.plotly_chart(fig2, use_container_width=True)
 
         else: